@@ -34,6 +34,12 @@ tf.compat.v1.app.flags.DEFINE_string('optimizer', 'RMSprop', 'Optimizer to use f
 tf.compat.v1.app.flags.DEFINE_string('model_name', 'local',
                                      'Name of model (used for name of checkpoints)')
 tf.compat.v1.app.flags.DEFINE_integer('batch_size', 50, 'Batch size')
+tf.compat.v1.app.flags.DEFINE_boolean(
+    'jit_compile', False, 'Whether to compile the training step and the kernels with XLA')
+tf.compat.v1.app.flags.DEFINE_boolean(
+    'tf32', None,
+    'Whether matrix multiplications on GPUs may use TensorFloat-32 (lower precision); '
+    'if not given, the setting of TensorFlow is left alone')
 tf.compat.v1.app.flags.DEFINE_integer('train_steps', 500, 'Number of training steps')
 tf.compat.v1.app.flags.DEFINE_integer('eval_epochs', 10000, 'Number of epochs between evaluations')
 tf.compat.v1.app.flags.DEFINE_integer('summary_steps', 100, 'How many steps between saving summary')
@@ -43,7 +49,8 @@ tf.compat.v1.app.flags.DEFINE_string(
     'save_dir', '', 'Directory where the checkpoints and summaries are saved (or \'\')')
 tf.compat.v1.app.flags.DEFINE_string('plot', 'simple_1d', 'Which function to use for plotting (or \'\')')
 tf.compat.v1.app.flags.DEFINE_integer('logging_steps', 1, 'How many steps between logging the loss')
-tf.compat.v1.app.flags.DEFINE_string('gpus', '0', 'Which GPUs to use (should normally only be one)')
+tf.compat.v1.app.flags.DEFINE_string(
+    'gpus', '0', 'Which GPUs to use (comma separated; several GPUs are used for data parallelism)')
 tf.compat.v1.app.flags.DEFINE_string(
     'preds_path', '', 'Path where the predictions for the test data will be save (or "")')
 tf.compat.v1.app.flags.DEFINE_integer('eval_throttle', 600,
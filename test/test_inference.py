@@ -62,3 +62,120 @@ def test_exact_complete():
     np.testing.assert_allclose(lml.numpy(), -2.34046, RTOL)
     np.testing.assert_allclose(tf.squeeze(pred_mean).numpy(), 0.0, RTOL, RTOL)
     np.testing.assert_allclose(tf.squeeze(pred_var).numpy(), 1.981779, RTOL)
+
+
+def test_exact_cached_posterior():
+    # construct objects
+    train_inputs, train_outputs, test_inputs, num_train, inducing_inputs = construct_input()
+    input_dim = 1
+    output_dim = 1
+    args = dict(sn=1.0, length_scale=0.5, sf=1.0, iso=False, cov='SquaredExponential')
+    exact = inference.Exact(args, 'LikelihoodGaussian', output_dim, num_train, inducing_inputs)
+    exact.build((num_train, input_dim))
+    exact.inference(train_inputs, train_outputs, True)
+
+    # predictions inside the context have to be the same as outside
+    pred_mean, pred_var = exact.prediction(test_inputs)
+
+    # count how often the posterior is computed
+    calls = []
+    build_posterior = exact._build_posterior
+    exact._build_posterior = lambda: calls.append(1) or build_posterior()
+
+    with exact.cached_posterior():
+        assert exact._posterior_cache is not None
+        cached_mean, cached_var = exact.prediction(test_inputs)
+        cached_mean2, cached_var2 = exact.prediction(test_inputs)
+    # the posterior is computed once for both predictions and dropped after the context
+    assert len(calls) == 1
+    assert exact._posterior_cache is None
+
+    np.testing.assert_allclose(cached_mean.numpy(), pred_mean.numpy(), RTOL, RTOL)
+    np.testing.assert_allclose(cached_var.numpy(), pred_var.numpy(), RTOL)
+    np.testing.assert_allclose(cached_mean2.numpy(), pred_mean.numpy(), RTOL, RTOL)
+    np.testing.assert_allclose(cached_var2.numpy(), pred_var.numpy(), RTOL)
+
+
+def test_variational_cached_posterior():
+    # construct objects
+    _, _, test_inputs, num_train, inducing_inputs = construct_input()
+    input_dim = 1
+    output_dim = 1
+    args = dict(num_samples=10, num_components=1, optimize_inducing=False, use_loo=False,
+                diag_post=False, sn=1.0, length_scale=0.5, sf=1.0, iso=False,
+                cov='SquaredExponential')
+    vi = inference.Variational(args, 'LikelihoodGaussian', output_dim, num_train, inducing_inputs)
+    vi.build((num_train, input_dim))
+    pred_mean, pred_var = vi.prediction(test_inputs)
+
+    # the Cholesky factor of the inducing kernel is computed in `_transform_variables`
+    calls = []
+    transform_variables = vi._transform_variables
+    vi._transform_variables = lambda *args: calls.append(1) or transform_variables(*args)
+
+    # two prediction batches share one factorization
+    with vi.cached_posterior():
+        cached_mean, cached_var = vi.prediction(test_inputs)
+        cached_mean2, cached_var2 = vi.prediction(test_inputs)
+    assert len(calls) == 1
+    # without the context, every batch computes it again
+    vi.prediction(test_inputs)
+    assert len(calls) == 2
+
+    np.testing.assert_allclose(cached_mean.numpy(), pred_mean.numpy(), RTOL, RTOL)
+    np.testing.assert_allclose(cached_var.numpy(), pred_var.numpy(), RTOL)
+    np.testing.assert_allclose(cached_mean2.numpy(), pred_mean.numpy(), RTOL, RTOL)
+    np.testing.assert_allclose(cached_var2.numpy(), pred_var.numpy(), RTOL)
+
+
+def test_variational_interim_vals_computed_once():
+    # construct objects
+    train_inputs, train_outputs, _, num_train, inducing_inputs = construct_input()
+    input_dim = 1
+    output_dim = 1
+    args = dict(num_samples=10, num_components=1, optimize_inducing=False, use_loo=True,
+                diag_post=False, sn=1.0, length_scale=0.5, sf=1.0, iso=False,
+                cov='SquaredExponential')
+    vi = inference.Variational(args, 'LikelihoodGaussian', output_dim, num_train, inducing_inputs)
+    vi.build((num_train, input_dim))
+
+    # count how often the kernel values are computed
+    calls = []
+    compute_interim_vals = vi._compute_interim_vals
+    vi._compute_interim_vals = lambda *inputs: calls.append(1) or compute_interim_vals(*inputs)
+
+    losses = vi.inference(train_inputs, train_outputs, True)
+    assert 'LOO_VARIATIONAL' in losses
+    assert len(calls) == 1
+    # the memoized values must not outlive the call
+    assert vi._interim_vals_cache is None
+    # and the memo must not become part of checkpoints
+    assert '_interim_vals_cache' not in vi._trackable_children()
+
+
+def test_variational_single_objective():
+    # construct objects
+    train_inputs, train_outputs, _, num_train, inducing_inputs = construct_input()
+    input_dim = 1
+    output_dim = 1
+    args = dict(num_samples=10, num_components=1, optimize_inducing=False, use_loo=True,
+                diag_post=False, sn=1.0, length_scale=0.5, sf=1.0, iso=False,
+                cov='SquaredExponential')
+    vi = inference.Variational(args, 'LikelihoodGaussian', output_dim, num_train, inducing_inputs)
+    vi.build((num_train, input_dim))
+
+    # record which parts of the objective are built
+    built = []
+    build_ell, build_loo_loss = vi._build_ell, vi._build_loo_loss
+    vi._build_ell = lambda *inputs: built.append('ell') or build_ell(*inputs)
+    vi._build_loo_loss = lambda *inputs: built.append('loo') or build_loo_loss(*inputs)
+
+    losses = vi.inference(train_inputs, train_outputs, True, objective='NELBO')
+    assert 'NELBO' in losses and 'LOO_VARIATIONAL' not in losses
+    assert built == ['ell']
+
+    built.clear()
+    losses = vi.inference(train_inputs, train_outputs, True, objective='LOO_VARIATIONAL')
+    assert list(losses) == ['LOO_VARIATIONAL']
+    assert built == ['loo']
+
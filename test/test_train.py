@@ -0,0 +1,41 @@
+"""Tests for the training functions"""
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from universalgp import inf as inference
+from universalgp import train
+
+
+def test_evaluate_logistic_regression():
+    # logistic regression has no posterior that could be cached
+    args = dict(use_bias=True, lr_l2_kernel_factor=0.1, lr_l2_bias_factor=0.1, s_as_input=False)
+    log_reg = inference.LogReg(args, 'LikelihoodLogistic', 1)
+    features = {'input': tf.constant([[-1.0], [0.0], [1.0], [2.0]]),
+                'sensitive': tf.constant([[0.0], [1.0], [0.0], [1.0]])}
+    outputs = tf.constant([[0.0], [1.0], [1.0], [1.0]])
+    data = tf.data.Dataset.from_tensor_slices((features, outputs)).batch(2)
+
+    train.evaluate(log_reg, data, 'logistic_accuracy')
+
+    # the prediction is the same as outside of `evaluate`
+    pred_mean, pred_var = log_reg.prediction(features)
+    assert pred_mean.shape == (4, 1)
+    np.testing.assert_array_equal(pred_var.numpy(), np.zeros((4, 1)))
+
+
+@pytest.mark.parametrize('inf', ['Exact', 'Loo', 'LogReg', 'FairLogReg', 'EqOddsLogReg'])
+def test_get_strategy_rejects_several_gpus(inf):
+    # these models can't be trained with the replica losses summed up
+    with pytest.raises(ValueError):
+        train._get_strategy(dict(gpus='0,1', inf=inf))
+    # one GPU is fine
+    assert train._get_strategy(dict(gpus='0', inf=inf)).num_replicas_in_sync == 1
+
+
+def test_device_of_strategy():
+    # a single requested device is used for the data and the eager operations
+    strategy = tf.distribute.OneDeviceStrategy('/cpu:0')
+    assert train._device(strategy).endswith('CPU:0')
+    assert train._device(tf.distribute.get_strategy()) is None
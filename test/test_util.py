@@ -135,3 +135,31 @@ def test_sq_dist():
     distance = np.clip(distance, 0.0, 1e8)
 
     np.testing.assert_allclose(sq_dist(point1, point2), distance, rtol=3e-7)
+
+
+def test_sq_dist_high_dim():
+    rng = np.random.RandomState(0)
+    point1 = rng.normal(size=[2, 4, 20])
+    point2 = rng.normal(size=[6, 20])
+
+    distance = np.sum((point1[..., :, np.newaxis, :] - point2[np.newaxis, np.newaxis]) ** 2, -1)
+
+    np.testing.assert_allclose(sq_dist(point1, point2), distance, rtol=1e-5)
+
+
+def test_sq_dist_high_dim_float32():
+    # points far away from the origin make |x|^2 + |y|^2 - 2 x.y lose precision in float32
+    rng = np.random.RandomState(0)
+    point1 = 100.0 + rng.normal(size=[5, 16])
+    point2 = 100.0 + rng.normal(size=[7, 16])
+
+    distance = np.sum((point1[:, np.newaxis, :] - point2[np.newaxis]) ** 2, -1)
+    self_distance = np.sum((point1[:, np.newaxis, :] - point1[np.newaxis]) ** 2, -1)
+
+    point1_tf = tf.constant(point1, dtype=tf.float32)
+    np.testing.assert_allclose(util.sq_dist(point1_tf, tf.constant(point2, dtype=tf.float32)),
+                               distance, rtol=1e-5, atol=1e-4)
+    # passing the same tensor twice marks the distances of the points to themselves
+    self_distance_tf = util.sq_dist(point1_tf, point1_tf).numpy()
+    np.testing.assert_allclose(self_distance_tf, self_distance, rtol=1e-5, atol=1e-4)
+    np.testing.assert_array_equal(np.diag(self_distance_tf), np.zeros(5))
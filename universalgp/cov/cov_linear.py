@@ -32,10 +32,10 @@ class Linear(Covariance):
             'lin_kern_sb' in self.args) else None
         init_sv = tf.keras.initializers.Constant(self.args['lin_kern_sv']) if (
             'lin_kern_sv' in self.args) else None
-        self.offset = self.add_variable("offset", [self.input_dim], initializer=init_offset,
-                                        dtype=tf.float32)
-        self.sigma_b = self.add_variable("sb", shape=[], initializer=init_sb, dtype=tf.float32)
-        self.sigma_v = self.add_variable("sv", shape=[], initializer=init_sv, dtype=tf.float32)
+        self.offset = self.add_weight("offset", [self.input_dim], initializer=init_offset,
+                                      dtype=tf.float32)
+        self.sigma_b = self.add_weight("sb", shape=[], initializer=init_sb, dtype=tf.float32)
+        self.sigma_v = self.add_weight("sv", shape=[], initializer=init_sv, dtype=tf.float32)
         super().build(input_shape)
 
     def call(self, point1, point2=None):
@@ -48,12 +48,12 @@ class Matern(Covariance):
         init_sf = tf.keras.initializers.Constant(self.args['sf']) if (
             'sf' in self.args) else None
         if not self.args['iso']:
-            self.length_scale = self.add_variable("length_scale", [input_dim], initializer=init_len,
-                                                  dtype=tf.float32)
+            self.length_scale = self.add_weight("length_scale", [self.input_dim],
+                                                initializer=init_len, dtype=tf.float32)
         else:
-            self.length_scale = self.add_variable("length_scale", shape=[], initializer=init_len,
-                                                  dtype=tf.float32)
-        self.sf = self.add_variable("sf", shape=[], initializer=init_sf, dtype=tf.float32)
+            self.length_scale = self.add_weight("length_scale", shape=[], initializer=init_len,
+                                                dtype=tf.float32)
+        self.sf = self.add_weight("sf", shape=[], initializer=init_sf, dtype=tf.float32)
         super().build(input_shape)
 
     def call(self, point1, point2=None):
@@ -64,11 +64,12 @@ class Matern(Covariance):
         Returns:
             Tensor of shape (batch_size, batch_size)
         """
-        length_scale_br = tf.reshape(self.length_scale, [1, 1 if self.iso else self.input_dim])
+        # shape () for the isotropic kernel, (input_dim,) otherwise; both broadcast over points
+        inv_length_scale = 1.0 / self.length_scale
         if point2 is None:
             point2 = point1
 
-        distance = util.euclidean_dist(point1 / length_scale_br, point2 / length_scale_br)
+        distance = util.euclidean_dist(point1 * inv_length_scale, point2 * inv_length_scale)
         latent = tf.sqrt(float(self.order)) * distance
         kern = self.sf ** 2 * tf.exp(- latent) * self._interim_f(latent)
         return kern
@@ -91,4 +92,4 @@ class Matern(Covariance):
         Returns:
             Tensor of shape (batch_size)
         """
-        return self.sf ** 2 * tf.ones([tf.shape(input=points)[-2]])
+        return tf.fill([tf.shape(input=points)[-2]], self.sf ** 2)
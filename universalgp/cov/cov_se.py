@@ -1,6 +1,7 @@
 """
 Squared exponential kernel
 """
+import numpy as np
 import tensorflow as tf
 from .. import util
 from .base import Covariance
@@ -11,30 +12,48 @@ tf.compat.v1.app.flags.DEFINE_boolean(
     'iso', False, 'True to use an isotropic kernel otherwise use automatic relevance det')
 
 
+def _kernel(point1, point2, log_length_scale, log_sf):
+    """Squared exponential kernel between `point1` and `point2` for the given parameters"""
+    # take the reciprocal once so that the points only have to be multiplied
+    # (shape () for the isotropic kernel, (input_dim,) otherwise; both broadcast over points)
+    inv_length_scale = tf.exp(-log_length_scale)
+    scaled1 = point1 * inv_length_scale
+    # `point2` is None for the covariance of `point1` with itself; `sq_dist` then sees the same
+    # tensor twice and can set the distances of the points to themselves to exactly 0
+    scaled2 = scaled1 if point2 is None else point2 * inv_length_scale
+    # sf^2 * exp(-d/2) = exp(2 log(sf) - d/2)
+    return tf.exp(2.0 * log_sf - 0.5 * util.sq_dist(scaled1, scaled2))
+
+
+# XLA compiled version of `_kernel`; it is traced (and specialized) for every combination of shapes
+_compiled_kernel = tf.function(_kernel, jit_compile=True)
+
+
 class SquaredExponential(Covariance):
     """Squared exponential kernel"""
 
     def __init__(self, args):
         super().__init__(args)
-        self.sf = None
-        self.length_scale = None
+        self.log_sf = None
+        self.log_length_scale = None
         self.iso = None
         self.input_dim = None
 
     def build(self, input_shape):
         self.input_dim = int(input_shape[-1])
         self.iso = self.args['iso']
-        length = tf.keras.initializers.Constant(self.args['length_scale']) if (
+        # the parameters are stored in log space which keeps them positive and saves the squaring
+        length = tf.keras.initializers.Constant(np.log(self.args['length_scale'])) if (
             'length_scale' in self.args) else None
-        sigma_f = tf.keras.initializers.Constant(self.args['sf']) if (
+        sigma_f = tf.keras.initializers.Constant(np.log(self.args['sf'])) if (
             'sf' in self.args) else None
         if not self.args['iso']:
-            self.length_scale = self.add_weight("length_scale", [self.input_dim],
-                                                initializer=length, dtype=tf.float32)
+            self.log_length_scale = self.add_weight("log_length_scale", [self.input_dim],
+                                                    initializer=length, dtype=tf.float32)
         else:
-            self.length_scale = self.add_weight("length_scale", shape=[], initializer=length,
-                                                dtype=tf.float32)
-        self.sf = self.add_weight("sf", shape=[], initializer=sigma_f, dtype=tf.float32)
+            self.log_length_scale = self.add_weight("log_length_scale", shape=[],
+                                                    initializer=length, dtype=tf.float32)
+        self.log_sf = self.add_weight("log_sf", shape=[], initializer=sigma_f, dtype=tf.float32)
         super().build(input_shape)
 
     def call(self, point1, point2=None):
@@ -45,13 +64,9 @@ class SquaredExponential(Covariance):
         Returns:
             Tensor of shape (batch_size, batch_size)
         """
-        length_scale_br = tf.reshape(self.length_scale, [1, 1 if self.iso else self.input_dim])
-        if point2 is None:
-            point2 = point1
-
-        kern = self.sf ** 2 * tf.exp(-util.sq_dist(point1 / length_scale_br,
-                                                   point2 / length_scale_br) / 2.0)
-        return kern
+        if 'jit_compile' in self.args and self.args['jit_compile']:
+            return _compiled_kernel(point1, point2, self.log_length_scale, self.log_sf)
+        return _kernel(point1, point2, self.log_length_scale, self.log_sf)
 
     def diag_cov_func(self, points):
         """
@@ -60,4 +75,4 @@ class SquaredExponential(Covariance):
         Returns:
             Tensor of shape (batch_size)
         """
-        return self.sf ** 2 * tf.ones([tf.shape(input=points)[-2]])
+        return tf.fill([tf.shape(input=points)[-2]], tf.exp(2.0 * self.log_sf))
@@ -1,4 +1,5 @@
 """Base class for inference methods"""
+import contextlib
 
 import tensorflow as tf
 
@@ -35,6 +36,8 @@ class Inference(tf.keras.Model):
         super().__init__()
         self.args = args
         self.num_train = num_train
+        self._cache_posterior = False
+        self._posterior_cache = None
 
     def inference(self, features, outputs, is_train):
         """Compute loss"""
@@ -44,6 +47,41 @@ class Inference(tf.keras.Model):
         """Return prediction for given inputs"""
         raise NotImplementedError("Implement `prediction`")
 
+    @contextlib.contextmanager
+    def cached_posterior(self):
+        """Reuse the parts of the prediction that don't depend on the test inputs.
+
+        Inside this context, `prediction` can be called on many batches while expensive quantities
+        (like the Cholesky decomposition of the training kernel) are only computed once. The
+        parameters of the model must not change while the context is active.
+        """
+        self._cache_posterior = True
+        try:
+            if self.built:
+                # fill the cache right away so that it can also be used by compiled functions
+                self._posterior()
+            yield
+        finally:
+            self._cache_posterior = False
+            self._posterior_cache = None
+
+    def _posterior(self):
+        """Return the output of `_build_posterior`, taken from the cache if possible."""
+        if self._posterior_cache is not None:
+            return self._posterior_cache
+        posterior = self._build_posterior()
+        if self._cache_posterior and tf.executing_eagerly():
+            # only eager tensors can be cached; graph tensors are bound to their graph
+            self._posterior_cache = posterior
+        return posterior
+
+    def _build_posterior(self):
+        """Compute the quantities needed for prediction that don't depend on the test inputs
+
+        Models that don't have such quantities return None.
+        """
+        return None
+
     def call(self, inputs, **_):
         return self._apply(inputs)
 
@@ -73,11 +73,11 @@ class Exact(Inference):
         Returns:
             predictive mean and variance
         """
-        return self.apply(test_inputs['input'])
+        return self(test_inputs['input'])
 
     def _apply(self, inputs):
-        train_inputs, train_outputs = self.store(inputs)
-        chol, alpha = self._build_interim_vals(train_inputs, train_outputs)
+        train_inputs, _ = self.store(inputs)
+        chol, alpha = self._posterior()
 
         # kxx_star (num_latent, num_train, num_test)
         kxx_star = self.cov[0](train_inputs, inputs)
@@ -94,6 +94,9 @@ class Exact(Inference):
 
         return pred_means[:, tf.newaxis], pred_vars[:, tf.newaxis]
 
+    def _build_posterior(self):
+        return self._build_interim_vals(self.store.train_inputs, self.store.train_outputs)
+
     def _build_interim_vals(self, train_inputs, train_outputs):
         _, var = self.lik(0, variances=0)
         # kxx (num_train, num_train)
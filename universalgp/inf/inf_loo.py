@@ -17,10 +17,10 @@ class Store(VariableStore):
     """Stores the variables for the LOO inference"""
     def build(self, input_shape):
         input_dim = int(input_shape[1])
-        self.train_inputs = self.add_variable('train_inputs', [self.num_train, input_dim],
-                                              trainable=False)
-        self.train_outputs = self.add_variable('train_outputs', [self.num_train, self.output_dim],
-                                               trainable=False)
+        self.train_inputs = self.add_weight('train_inputs', [self.num_train, input_dim],
+                                            trainable=False)
+        self.train_outputs = self.add_weight('train_outputs', [self.num_train, self.output_dim],
+                                             trainable=False)
         super().build(input_shape)
 
     def call(self, inputs):
@@ -72,11 +72,11 @@ class Loo(Inference):
         Returns:
             predictive mean and variance
         """
-        return self.apply(test_inputs['input'])
+        return self(test_inputs['input'])
 
     def _apply(self, inputs):
-        train_inputs, train_outputs = self.store(inputs)
-        chol, alpha = self._build_interim_vals(train_inputs, train_outputs)
+        train_inputs, _ = self.store(inputs)
+        chol, alpha = self._posterior()
 
         # kxx_star (num_latent, num_train, num_test)
         kxx_star = self.cov[0](train_inputs, point2=inputs)
@@ -89,10 +89,13 @@ class Loo(Inference):
         v = tfl.triangular_solve(chol, kxx_star)
         # var_f_star (same shape as Kx_star_x_star)
         var_f_star = tfl.tensor_diag_part(kx_star_x_star - tf.reduce_sum(v ** 2, axis=-2))
-        pred_means, pred_vars = self.lik(tf.squeeze(f_star_mean, -1), variacnes=var_f_star)
+        pred_means, pred_vars = self.lik(tf.squeeze(f_star_mean, -1), variances=var_f_star)
 
         return pred_means, pred_vars
 
+    def _build_posterior(self):
+        return self._build_interim_vals(self.store.train_inputs, self.store.train_outputs)
+
     def _build_interim_vals(self, train_inputs, train_outputs):
         _, var = self.lik(0, variances=0)
         # kxx (num_train, num_train)
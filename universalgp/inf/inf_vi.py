@@ -108,6 +108,7 @@ class Variational(Inference):
         self.num_latents = output_dim
         self.store = Store(args, output_dim, num_train, inducing_inputs)
         self.lik, self.cov = util.construct_lik_and_cov(self, args, lik_name, output_dim)
+        self._interim_vals_cache = None
 
     def _transform_variables(self, inputs=1):
         """Transorm variables that were stored in a more compact form.
@@ -125,18 +126,43 @@ class Variational(Inference):
         kernel_chol = tfl.cholesky(kernel_mat + jitter)
         return weights, chol_covars, kernel_chol, means, inducing_inputs
 
-    def inference(self, features, outputs, is_train):
+    def inference(self, features, outputs, is_train, objective=None):
         """Build graph for computing negative evidence lower bound and predictive mean and variance
 
         Args:
             train_inputs: inputs
             train_outputs: targets
+            objective: (optional) either 'NELBO' or 'LOO_VARIATIONAL'; if given, only the
+                objective functions that are needed for it are computed
         Returns:
             negative evidence lower bound and variables to train
         """
+        # `_build_ell` and `_build_loo_loss` need the same kernel values; compute them only once
+        self._set_interim_vals_cache({})
+        try:
+            return self._inference(features, outputs, is_train, objective)
+        finally:
+            self._set_interim_vals_cache(None)
+
+    @tf.__internal__.tracking.no_automatic_dependency_tracking
+    def _set_interim_vals_cache(self, cache):
+        """Set the memo of `_build_interim_vals` without Keras tracking it as a dependency.
+
+        Otherwise, the dictionary would be part of every checkpoint and keep the tensors of the
+        last call alive.
+        """
+        self._interim_vals_cache = cache
+
+    def _inference(self, features, outputs, is_train, objective):
+        """Implementation of `inference`"""
         # First transform all raw variables into their internal form.
         weights, chol_covars, kernel_chol, means, inducing_inputs = self._transform_variables(1)
 
+        if objective == 'LOO_VARIATIONAL':
+            # the NELBO is not needed
+            return {'LOO_VARIATIONAL': self._build_loo_loss(
+                weights, means, chol_covars, inducing_inputs, kernel_chol, features, outputs)}
+
         # Build the objective function.
         entropy = self._build_entropy(weights, means, chol_covars)
         cross_ent = self._build_cross_ent(weights, means, chol_covars, kernel_chol)
@@ -147,6 +173,9 @@ class Variational(Inference):
 
         obj_funcs = dict(elbo=-nelbo, entropy=(batch_size / self.num_train) * entropy,
                          cross_ent=(batch_size / self.num_train) * cross_ent, ell=ell)
+        if objective == 'NELBO':
+            # the LOO loss is not needed
+            return {**obj_funcs, 'NELBO': tf.squeeze(nelbo)}
         if self.args['use_loo']:
             # Compute LOO loss only when necessary
             loo_loss = self._build_loo_loss(
@@ -173,9 +202,11 @@ class Variational(Inference):
         Returns:
             means and variances of the predictive distribution
         """
-        # Transform all raw variables into their internal form.
-        weights, chol_covars, kernel_chol, means, inducing_inputs = self._transform_variables(
-            inputs)
+        if not self.store.built:
+            # the store needs the shape of the inputs to create its variables
+            self.store(inputs)
+        # Transform all raw variables into their internal form (or take them from the cache).
+        weights, chol_covars, kernel_chol, means, inducing_inputs = self._posterior()
 
         kern_prods, kern_sums = self._build_interim_vals(kernel_chol, inducing_inputs,
                                                          inputs)
@@ -192,6 +223,10 @@ class Variational(Inference):
                 tf.reduce_sum(input_tensor=weights * pred_means, axis=0) ** 2)
         return weighted_means, weighted_vars
 
+    def _build_posterior(self):
+        # convert the variables to tensors so that a cached posterior doesn't hold on to variables
+        return tuple(tf.convert_to_tensor(value) for value in self._transform_variables())
+
     def _build_entropy(self, weights, means, chol_covars):
         """Construct entropy.
 
@@ -239,21 +274,31 @@ class Variational(Inference):
         component_covar = tf.stack(component_covar, 0)
         component_mean = tf.squeeze(tf.stack(component_mean, 0), -1)
         """
+        if self.args['num_components'] == 1:
+            # The only normal is evaluated at its own mean, so the quadratic form vanishes and the
+            # log probability is given by the log determinant alone; no triangular solve needed.
+            # The covariance is S + S = 2S, so log|2S| = M log(2) + log|S|.
+            num_inducing = tf.cast(tf.shape(input=means)[-1], dtype=tf.float32)
+            if self.args['diag_post']:
+                log_det = tf.reduce_sum(input_tensor=tfm.log(2.0 * chol_covars), axis=-1)
+            else:
+                log_det = num_inducing * np.log(2.0) + util.log_cholesky_det(chol_covars)
+            # sum over all latent functions; shape of log_normal_prob: (1,)
+            log_normal_prob = tf.reduce_sum(
+                input_tensor=-0.5 * (num_inducing * np.log(2 * np.pi) + log_det), axis=-1)
+            return -util.mul_sum(weights, tfm.log(weights) + log_normal_prob)
+
         # First build a square matrix of normals.
         if self.args['diag_post']:
             # construct normal distributions for all combinations of components
             variational_dist = tfd.MultivariateNormalDiag(
                 means, tf.sqrt(chol_covars[tf.newaxis, ...] + chol_covars[:, tf.newaxis, ...]))
         else:
-            if self.args['num_components'] == 1:
-                # Use the fact that chol(S + S) = sqrt(2) * chol(S)
-                chol_covars_sum = tf.sqrt(2.) * chol_covars[tf.newaxis, ...]
-            else:
-                # Here we use the original component_covar directly
-                # TODO: Can we just stay in cholesky space somehow?
-                component_covar = util.mat_square(chol_covars)
-                chol_covars_sum = tfl.cholesky(component_covar[tf.newaxis, ...] +
-                                               component_covar[:, tf.newaxis, ...])
+            # Here we use the original component_covar directly
+            # TODO: Can we just stay in cholesky space somehow?
+            component_covar = util.mat_square(chol_covars)
+            chol_covars_sum = tfl.cholesky(component_covar[tf.newaxis, ...] +
+                                           component_covar[:, tf.newaxis, ...])
             # The class MultivariateNormalTriL only accepts cholesky decompositions of covariances
             variational_dist = tfd.MultivariateNormalTriL(means[tf.newaxis, ...], chol_covars_sum)
 
@@ -284,17 +329,23 @@ class Variational(Inference):
         if self.args['diag_post']:
             # TODO(karl): this is a bit inefficient since we're not making use of the fact
             # that chol_covars is diagonal. A solution most likely involves a custom tf op.
-
-            # shape of trace: (num_components, num_latents)
-            trace = tfl.trace(util.cholesky_solve_br(kernel_chol, tfl.diag(chol_covars)))
-        else:
-            trace = tf.reduce_sum(
-                input_tensor=util.mul_sum(util.cholesky_solve_br(kernel_chol, chol_covars),
-                                          chol_covars), axis=-1)
-
+            chol_covars = tfl.diag(tf.sqrt(chol_covars))
+
+        # With K = L L^T and S = C C^T, we need trace(K^-1 S) = |L^-1 C|^2 and the quadratic form
+        # m^T K^-1 m = |L^-1 m|^2 of log N(m; 0, K). Both come from one triangular solve against L.
+        # shape of solved: (num_components, num_latents, num_inducing, num_inducing + 1)
+        solved = tfl.triangular_solve(kernel_chol,
+                                      tf.concat([chol_covars, means[..., tf.newaxis]], axis=-1))
+        squared_norms = tf.reduce_sum(input_tensor=solved ** 2, axis=-2)
+        # shape of trace and quad_form: (num_components, num_latents)
+        trace = tf.reduce_sum(input_tensor=squared_norms[..., :-1], axis=-1)
+        quad_form = squared_norms[..., -1]
+
+        num_inducing = tf.cast(tf.shape(input=means)[-1], dtype=tf.float32)
+        log_prob = -0.5 * (num_inducing * np.log(2 * np.pi) + util.log_cholesky_det(kernel_chol) +
+                           quad_form)
         # sum_val has the same shape as weights
-        gaussian = tfd.MultivariateNormalTriL(means, kernel_chol)
-        sum_val = tf.reduce_sum(input_tensor=gaussian.log_prob([0.0]) - 0.5 * trace, axis=-1)
+        sum_val = tf.reduce_sum(input_tensor=log_prob - 0.5 * trace, axis=-1)
 
         # weighted sum of weights and sum_val
         cross_ent = util.mul_sum(weights, sum_val)
@@ -364,21 +415,30 @@ class Variational(Inference):
             `kern_prods` (num_latents, batch_size, num_inducing)
             and `kern_sums` (num_latents, batch_size)
         """
+        if self._interim_vals_cache is not None:
+            # the values are memoized for the duration of one `inference` call
+            key = (kernel_chol.ref(), inducing_inputs.ref(), train_inputs.ref())
+            if key not in self._interim_vals_cache:
+                self._interim_vals_cache[key] = self._compute_interim_vals(
+                    kernel_chol, inducing_inputs, train_inputs)
+            return self._interim_vals_cache[key]
+        return self._compute_interim_vals(kernel_chol, inducing_inputs, train_inputs)
+
+    def _compute_interim_vals(self, kernel_chol, inducing_inputs, train_inputs):
+        """Implementation of `_build_interim_vals`"""
+        # Every latent function has its own covariance function, so the kernels are evaluated
+        # separately. All the linear algebra is then done in one batch over the latent functions.
         # shape of ind_train_kern: (num_latents, num_inducing, batch_size)
+        ind_train_kern = tf.stack([self.cov[i](inducing_inputs[i, :, :], point2=train_inputs)
+                                   for i in range(self.num_latents)], 0)
+        # shape of train_diag: (num_latents, batch_size)
+        train_diag = tf.stack([self.cov[i].diag_cov_func(train_inputs)
+                               for i in range(self.num_latents)], 0)
 
-        kern_prods = [0.0 for _ in range(self.num_latents)]
-        kern_sums = [0.0 for _ in range(self.num_latents)]
-
-        for i in range(self.num_latents):
-            ind_train_kern = self.cov[i](inducing_inputs[i, :, :], point2=train_inputs)
-            # Compute A = Kxz.Kzz^(-1) = (Kzz^(-1).Kzx)^T.
-            kern_prods[i] = tf.transpose(a=tfl.cholesky_solve(kernel_chol[i, :, :], ind_train_kern))
-            # We only need the diagonal components.
-            kern_sums[i] = (self.cov[i].diag_cov_func(train_inputs) -
-                            util.mul_sum(kern_prods[i], tfl.matrix_transpose(ind_train_kern)))
-
-        kern_prods = tf.stack(kern_prods, 0)
-        kern_sums = tf.stack(kern_sums, 0)
+        # Compute A = Kxz.Kzz^(-1) = (Kzz^(-1).Kzx)^T.
+        kern_prods = tfl.matrix_transpose(tfl.cholesky_solve(kernel_chol, ind_train_kern))
+        # We only need the diagonal components.
+        kern_sums = train_diag - util.mul_sum(kern_prods, tfl.matrix_transpose(ind_train_kern))
 
         return kern_prods, kern_sums
 
@@ -1,5 +1,6 @@
 """Eager training of GP model."""
 
+import contextlib
 import time
 from pathlib import Path
 from tempfile import mkdtemp
@@ -10,97 +11,248 @@ import tensorflow as tf
 from . import util
 
 
-def fit(gp, optimizer, data, args):
+def fit(gp, optimizer, data, args, strategy=None):
     """Trains model on `train_data` using `optimizer`.
 
     Args:
         gp: gaussian process
         optimizer: tensorflow optimizer
-        data: a `tf.data.Dataset` object
+        data: a `tf.data.Dataset` object (distributed if `strategy` has several replicas)
         args: additional parameters
+        strategy: (optional) distribution strategy under which `gp` and `optimizer` were created
     """
+    if strategy is None:
+        strategy = tf.distribute.get_strategy()
 
     start = time.time()
     step_counter = optimizer.iterations
+    # read the counter only once; afterwards, the step is derived from the batch number so that
+    # the loop doesn't have to wait for the device
+    first_step = int(step_counter.numpy())
+    if args['loo_steps']:
+        # Alternate loss between NELBO and LOO. Each loss gets its own compiled step, so that only
+        # the loss that is currently optimized is computed and differentiated.
+        nelbo_steps = args['nelbo_steps'] if args['nelbo_steps'] > 0 else args['loo_steps']
+        nelbo_step = _make_train_step(gp, optimizer, 'NELBO', strategy, args)
+        loo_step = _make_train_step(gp, optimizer, 'LOO_VARIATIONAL', strategy, args)
+    else:
+        train_step = _make_train_step(gp, optimizer, 'loss', strategy, args)
+    # the losses are averaged on the device and only fetched when they are logged
+    # (with `loo_steps`, every step only computes the loss that it optimizes)
+    avg_losses = {}
     for (batch_num, (features, outputs)) in enumerate(data):
-        # Record the operations used to compute the loss given the input, so that the gradient of
-        # the loss with respect to the variables can be computed.
-        with tf.GradientTape() as tape:
-            obj_func = gp.inference(features, outputs, True)
-        # Compute gradients
-        all_params = gp.trainable_variables
+        step = first_step + batch_num
         if args['loo_steps']:
-            # Alternate loss between NELBO and LOO
-            nelbo_steps = args['nelbo_steps'] if args['nelbo_steps'] > 0 else args['loo_steps']
-            if (step_counter.numpy() % (nelbo_steps + args['loo_steps'])) < nelbo_steps:
-                grads_and_params = zip(tape.gradient(obj_func['NELBO'], all_params), all_params)
+            if (step % (nelbo_steps + args['loo_steps'])) < nelbo_steps:
+                train_step = nelbo_step
             else:
-                grads_and_params = zip(
-                    tape.gradient(obj_func['LOO_VARIATIONAL'], all_params), all_params)
-        else:
-            grads_and_params = zip(tape.gradient(obj_func['loss'], all_params), all_params)
-        # Apply gradients
-        optimizer.apply_gradients(grads_and_params)
+                train_step = loo_step
+        obj_func = train_step(features, outputs)
 
-        if args['logging_steps'] != 0 and batch_num % args['logging_steps'] == 0:
-            print(f"Step #{step_counter.numpy()} ({time.time() - start:.4f} sec)\t", end=' ')
+        for loss_name, loss_value in obj_func.items():
+            if loss_name not in avg_losses:
+                avg_losses[loss_name] = tf.keras.metrics.Mean(loss_name, dtype=tf.float32)
+            avg_losses[loss_name](loss_value)
+
+        if args['summary_steps'] != 0 and batch_num % args['summary_steps'] == 0:
+            # this does nothing if no default summary writer has been set
             for loss_name, loss_value in obj_func.items():
-                print(f"{loss_name}: {loss_value:.2f}", end=' ')
+                tf.summary.scalar(loss_name, loss_value, step=step + 1)
+
+        if args['logging_steps'] != 0 and batch_num % args['logging_steps'] == 0:
+            print(f"Step #{step + 1} ({time.time() - start:.4f} sec)\t", end=' ')
+            for loss_name, avg_loss in avg_losses.items():
+                print(f"{loss_name}: {avg_loss.result():.2f}", end=' ')
             print("")  # newline
+            # start new averages, so that only the losses of the coming steps are printed
+            avg_losses = {}
             start = time.time()
 
 
+def _make_train_step(gp, optimizer, loss_name, strategy, args):
+    """Construct a compiled function that does one optimization step.
+
+    Args:
+        gp: gaussian process
+        optimizer: tensorflow optimizer
+        loss_name: name of the objective function that is minimized
+        strategy: distribution strategy under which `gp` and `optimizer` were created
+        args: additional parameters
+    Returns:
+        a function that takes features and outputs of one batch and returns the objective functions
+    """
+    @tf.function(jit_compile=args['jit_compile'])
+    def _compute_gradients(features, outputs):
+        # Record the operations used to compute the loss given the input, so that the gradient of
+        # the loss with respect to the variables can be computed.
+        with tf.GradientTape() as tape:
+            if loss_name == 'loss':
+                obj_func = gp.inference(features, outputs, True)
+            else:
+                # only build the objective function that is optimized in this step
+                obj_func = gp.inference(features, outputs, True, objective=loss_name)
+        return obj_func, tape.gradient(obj_func[loss_name], gp.trainable_variables)
+
+    def _replica_step(features, outputs):
+        obj_func, grads = _compute_gradients(features, outputs)
+        # Apply gradients (the optimizer sums the gradients of all replicas)
+        optimizer.apply_gradients(zip(grads, gp.trainable_variables))
+        return obj_func
+
+    @tf.function
+    def _train_step(features, outputs):
+        obj_func = strategy.run(_replica_step, args=(features, outputs))
+        # the objective functions of the GP models are sums over the examples in the batch
+        # (models with averaged losses are rejected in `_get_strategy`)
+        return {loss_name: strategy.reduce(tf.distribute.ReduceOp.SUM, loss_value, axis=None)
+                for loss_name, loss_value in obj_func.items()}
+
+    return _train_step
+
+
+def _prefetch(data, device=None):
+    """Prefetch batches from `data` and copy them to `device` (or the first GPU) ahead of time.
+
+    This has to be the last transformation of the dataset.
+    """
+    data = data.prefetch(tf.data.AUTOTUNE)
+    if device is None:
+        gpus = tf.config.list_logical_devices('GPU')
+        device = gpus[0].name if gpus else None
+    if device is not None:
+        data = data.apply(tf.data.experimental.prefetch_to_device(device))
+    return data
+
+
+def _distribute(data, strategy):
+    """Distribute the batches of `data` over the replicas of `strategy`."""
+    if strategy.num_replicas_in_sync > 1:
+        # the distributed dataset takes care of copying the batches to the devices
+        return strategy.experimental_distribute_dataset(data.prefetch(tf.data.AUTOTUNE))
+    return _prefetch(data, _device(strategy))
+
+
+def _device(strategy):
+    """The device of `strategy` if it runs on one specific device, otherwise None."""
+    if isinstance(strategy, tf.distribute.OneDeviceStrategy):
+        return strategy.extended.worker_devices[0]
+    return None
+
+
+def _on_device(strategy):
+    """Context that places eager operations on the device of `strategy` (if it has only one).
+
+    The scope of a `OneDeviceStrategy` only places the variables and `strategy.run`.
+    """
+    device = _device(strategy)
+    return tf.device(device) if device is not None else contextlib.nullcontext()
+
+
+def _get_strategy(args):
+    """Construct the distribution strategy for the GPUs given in the flags.
+
+    Args:
+        args: parameters in form of a dictionary
+    Returns:
+        `MirroredStrategy` if more than one GPU is requested, `OneDeviceStrategy` if one GPU is
+        requested and GPUs are available, otherwise the default strategy
+    """
+    gpus = [f"/gpu:{gpu.strip()}" for gpu in args['gpus'].split(',') if gpu.strip()]
+    if len(gpus) > 1:
+        if args['inf'] in ('Exact', 'Loo'):
+            raise ValueError(f"{args['inf']} inference needs all training data in one batch and "
+                             "cannot be distributed over several GPUs")
+        if args['inf'] in ('LogReg', 'FairLogReg', 'EqOddsLogReg'):
+            # the replica losses are summed up, which is only correct for sums over the batch
+            raise ValueError(f"{args['inf']} averages its loss over the batch and cannot be "
+                             "distributed over several GPUs")
+        return tf.distribute.MirroredStrategy(gpus)
+    if gpus and tf.config.list_logical_devices('GPU'):
+        # without a strategy, everything would run on the first GPU
+        return tf.distribute.OneDeviceStrategy(gpus[0])
+    return tf.distribute.get_strategy()
+
+
+def _cached_posterior(gp):
+    """Context in which `gp` caches its posterior; a no-op for models that don't have one."""
+    if hasattr(gp, 'cached_posterior'):
+        return gp.cached_posterior()
+    # e.g. logistic regression, which doesn't derive from `Inference`
+    return contextlib.nullcontext()
+
+
 def evaluate(gp, data, dataset_metric):
     """Perform an evaluation of `inf_func` on the examples from `dataset`.
 
     Args:
         gp: gaussian process
-        data: a `tf.data.Dataset` object
+        data: a `tf.data.Dataset` object or any other iterable of batches
         dataset_metric: the metrics that are supposed to be evaluated
     """
     avg_loss = tf.keras.metrics.Mean('loss', dtype=tf.float32)
     metrics = util.init_metrics(dataset_metric)
 
-    for (features, outputs) in data:
-        pred_mean, _ = gp.prediction(features)
-        obj_func = gp.inference(features, outputs, False)
-        avg_loss(obj_func['loss'])
-        util.update_metrics(metrics, features, outputs, pred_mean)
+    with _cached_posterior(gp):
+        for (features, outputs) in data:
+            pred_mean, _ = gp.prediction(features)
+            obj_func = gp.inference(features, outputs, False)
+            avg_loss(obj_func['loss'])
+            util.update_metrics(metrics, features, outputs, pred_mean)
     print(f"Test set: Average loss: {avg_loss.result()}")
     util.record_metrics(metrics)
 
 
-def predict(test_inputs, saved_model, dataset_info, args):
+def predict(test_inputs, saved_model, dataset_info, args, max_pred_batch=10_000):
     """Predict outputs given test inputs.
 
     This function can be called from a different module and should still work.
 
+    If several GPUs are given in `args`, each of them predicts on its own batch at the same time.
+
     Args:
         test_inputs: ndarray. Points on which we wish to make predictions.
             Dimensions: num_test * input_dim.
         saved_model: path to saved model
         dataset_info: info about the dataset
         args: additional parameters
+        max_pred_batch: batch size that is used if no batch size is given in `args`
 
     Returns:
         ndarray. The predicted mean of the test inputs. Dimensions: num_test * output_dim.
         ndarray. The predicted variance of the test inputs. Dimensions: num_test * output_dim.
     """
-    if args['batch_size'] is None:
-        num_batches = 1
-    else:
-        num_batches = util.ceil_divide(test_inputs.shape[0], args['batch_size'])
+    batch_size = max_pred_batch if args['batch_size'] is None else args['batch_size']
+
+    strategy = _get_strategy(args)
+    with strategy.scope():
+        gp = util.construct_from_flags(args, dataset_info, dataset_info.inducing_inputs.shape[0])
+        checkpoint = tf.train.Checkpoint(gp=gp)
+        checkpoint.restore(saved_model).expect_partial()
+        gp.build((None, test_inputs.shape[-1]))
+
+    # with several GPUs, every one of them gets a batch of size `batch_size` in each step
+    data = _distribute(tf.data.Dataset.from_tensor_slices(test_inputs.astype(np.float32)).batch(
+        batch_size * strategy.num_replicas_in_sync), strategy)
 
-    gp = util.construct_from_flags(args, dataset_info, dataset_info.inducing_inputs.shape[0])
-    checkpoint = tf.train.Checkpoint(gp=gp)
-    checkpoint.restore(saved_model).expect_partial()
+    def _predict_step(inputs):
+        return gp.prediction({'input': inputs})
 
-    test_inputs = np.array_split(test_inputs, num_batches)
-    mean, var = [0.0] * num_batches, [0.0] * num_batches
-    for i in range(num_batches):
-        mean[i], var[i] = gp.prediction({'input': tf.constant(test_inputs[i], dtype=tf.float32)})
+    @tf.function
+    def _predict_all(data):
+        means = tf.TensorArray(tf.float32, size=0, dynamic_size=True, infer_shape=False)
+        variances = tf.TensorArray(tf.float32, size=0, dynamic_size=True, infer_shape=False)
+        for inputs in data:
+            mean, var = strategy.run(_predict_step, args=(inputs,))
+            # the results of the replicas are in the same order as the parts of the batch
+            for mean_part, var_part in zip(strategy.experimental_local_results(mean),
+                                           strategy.experimental_local_results(var)):
+                means = means.write(means.size(), mean_part)
+                variances = variances.write(variances.size(), var_part)
+        return means.concat(), variances.concat()
 
-    return np.concatenate(mean, axis=0), np.concatenate(var, axis=0)
+    with _on_device(strategy), _cached_posterior(gp):
+        mean, var = _predict_all(data)
+    return mean.numpy(), var.numpy()
 
 
 def train_gp(dataset, args):
@@ -113,6 +265,11 @@ def train_gp(dataset, args):
         trained GP
     """
 
+    # TensorFloat-32 speeds up the matrix multiplications on recent GPUs, but it lowers their
+    # precision to a 10 bit mantissa. This changes a global setting, so it's only done on request.
+    if 'tf32' in args and args['tf32'] is not None:
+        tf.config.experimental.enable_tensor_float_32_execution(args['tf32'])
+
     # Set checkpoint path
     if args['save_dir']:
         out_dir = Path(args['save_dir']) / Path(args['model_name'])
@@ -121,36 +278,48 @@ def train_gp(dataset, args):
         out_dir = Path(mkdtemp())  # Create temporary directory
     checkpoint_prefix = out_dir / Path('model.ckpt')
 
-    # Construct objects
-    gp = util.construct_from_flags(args, dataset, dataset.inducing_inputs)
-    optimizer = util.get_optimizer(args)
+    # Variables that are created in the scope of the strategy are mirrored on all its devices.
+    # This also applies to variables that are only created lazily on the first call of `gp`.
+    strategy = _get_strategy(args)
+    with strategy.scope(), _on_device(strategy):
+        # Construct objects
+        gp = util.construct_from_flags(args, dataset, dataset.inducing_inputs)
+        optimizer = util.get_optimizer(args)
 
-    # Restore from existing checkpoint
-    checkpoint = tf.train.Checkpoint(gp=gp, optimizer=optimizer)
-    checkpoint.restore(tf.train.latest_checkpoint(out_dir)).expect_partial()
-    step_counter = optimizer.iterations
+        # Restore from existing checkpoint
+        checkpoint = tf.train.Checkpoint(gp=gp, optimizer=optimizer)
+        checkpoint.restore(tf.train.latest_checkpoint(out_dir)).expect_partial()
+        step_counter = optimizer.iterations
 
-    step = 0
-    # shuffle and repeat for the required number of epochs
-    train_data = dataset.train.shuffle(50_000).repeat(args['eval_epochs']).batch(
-        args['batch_size'])
-    # start with one evaluation
-    evaluate(gp, dataset.test.batch(args['batch_size']), dataset.metric)
-    while step < args['train_steps']:
-        start = time.time()
-        # take *at most* (train_steps - step) batches so that we don't run longer than `train_steps`
-        fit(gp, optimizer, train_data.take(args['train_steps'] - step), args)
-        end = time.time()
-        step = step_counter.numpy()
-        print(f"Train time for the last {args['eval_epochs']} epochs (global step {step}):"
-              f" {end - start:0.2f}s")
-        evaluate(gp, dataset.test.batch(args['batch_size']), dataset.metric)
-        # TODO: don't ignore the 'chkpnt_steps' flag
-        ckpt_path = checkpoint.save(checkpoint_prefix)
-        print(f"Saved checkpoint in '{ckpt_path}'")
+        step = 0
+        # shuffle and repeat for the required number of epochs
+        # (with several GPUs, each batch is split between them)
+        train_data = dataset.train.shuffle(50_000).repeat(args['eval_epochs']).batch(
+            args['batch_size'])
+        # the test batches are assembled once and kept in host memory; for every evaluation they
+        # are only streamed to the device one at a time, so that they don't occupy its memory
+        test_data = _prefetch(dataset.test.batch(args['batch_size']).cache(), _device(strategy))
+        # the losses are written to `out_dir` so that they can be looked at with TensorBoard
+        summary_writer = tf.summary.create_file_writer(str(out_dir))
+        # start with one evaluation
+        evaluate(gp, test_data, dataset.metric)
+        while step < args['train_steps']:
+            start = time.time()
+            # take *at most* (train_steps - step) batches so that we don't run longer than
+            # `train_steps`
+            with summary_writer.as_default():
+                fit(gp, optimizer, _distribute(train_data.take(args['train_steps'] - step),
+                                               strategy), args, strategy)
+            end = time.time()
+            step = step_counter.numpy()
+            print(f"Train time for the last {args['eval_epochs']} epochs (global step {step}):"
+                  f" {end - start:0.2f}s")
+            evaluate(gp, test_data, dataset.metric)
+            # TODO: don't ignore the 'chkpnt_steps' flag
+            ckpt_path = checkpoint.save(checkpoint_prefix)
+            print(f"Saved checkpoint in '{ckpt_path}'")
 
     if args['plot'] or args['preds_path']:  # Create predictions
-        tf.compat.v1.reset_default_graph()
         mean, var = predict(dataset.xtest, tf.train.latest_checkpoint(out_dir), dataset, args)
         util.post_training(mean, var, out_dir, dataset, args)
     return gp
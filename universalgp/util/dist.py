@@ -7,6 +7,8 @@ from tensorflow import linalg as tfl
 
 MAX_DIST = 1e8
 EPS = 1e-8
+# above this number of input dimensions, `sq_dist` is computed with a matrix multiplication
+EXPANDED_MIN_DIM = 8
 
 
 def dist(point1, point2):
@@ -16,11 +18,35 @@ def dist(point1, point2):
     return expanded1 - expanded2
 
 
+def expanded_sq_dist(point1, point2):
+    """Compute the square distance between point1 and point2 as |x|^2 + |y|^2 - 2 x.y
+
+    This avoids materializing all pairwise difference vectors and does the bulk of the work in a
+    matrix multiplication, at the price of some precision when the points are close to each other.
+    """
+    # the rounding error of the expansion grows with |x|^2, so move the points close to the origin
+    # first (the distances don't change under translation)
+    centre = tf.reduce_mean(input_tensor=point2, axis=list(range(len(point2.shape) - 1)))
+    point1 = point1 - centre
+    point2 = point2 - centre
+    square1 = tf.reduce_sum(input_tensor=point1**2, axis=-1)[..., :, tf.newaxis]
+    square2 = tf.reduce_sum(input_tensor=point2**2, axis=-1)[..., tf.newaxis, :]
+    return square1 + square2 - 2.0 * tf.matmul(point1, point2, transpose_b=True)
+
+
 def sq_dist(point1, point2):
     """Compute the square distance between point1 and point2."""
-    distance_vectors = dist(point1, point2)
-
-    squared_distance = tf.reduce_sum(input_tensor=distance_vectors**2, axis=-1)
+    input_dim = point1.shape[-1]
+    if input_dim is not None and input_dim > EXPANDED_MIN_DIM:
+        # the difference vectors would be large; use the matrix multiplication instead
+        squared_distance = expanded_sq_dist(point1, point2)
+        if point2 is point1:
+            # the distance of every point to itself is exactly 0 (and not a rounding error)
+            squared_distance = tfl.set_diag(squared_distance,
+                                            tf.zeros_like(tfl.diag_part(squared_distance)))
+    else:
+        distance_vectors = dist(point1, point2)
+        squared_distance = tf.reduce_sum(input_tensor=distance_vectors**2, axis=-1)
 
     # distance = tfl.norm(distance_vectors, ord=2, axis=-1)
     # squared_distance = distance**2